@@ -13,27 +13,40 @@ Usage:
   python scripts/agent_hook.py --hypothesis "The issue might be in the Z-buffer."
 """
 
-import os
+import io
 import sys
 import argparse
-import subprocess
+import traceback
+from contextlib import redirect_stdout
 
-def run_script(script_name, args):
-    """Runs a sibling script via subprocess."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    script_path = os.path.join(script_dir, script_name)
-    
-    cmd = [sys.executable, script_path] + args
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"Error running {script_name}:")
-        print(result.stderr)
-        return False
+import agent_logger
+import knowledge_tracker
+import reference_linker
+
+def run_step(step_name, func, *args):
+    """
+    Runs a sibling tool in-process, swallowing its stdout like a subprocess would.
+    Returns (success, result of func).
+    """
+    try:
+        with redirect_stdout(io.StringIO()):
+            result = func(*args)
+    except (Exception, SystemExit):
+        print(f"Error running {step_name}:")
+        print(traceback.format_exc())
+        return False, None
     
-    # Optional: Print stdout if verbose
-    # print(result.stdout)
-    return True
+    # Optional: Print captured stdout if verbose
+    return True, result
+
+def build_report():
+    tracker = knowledge_tracker.KnowledgeTracker()
+    return tracker, tracker.generate_report_str()
+
+def link_and_write(tracker, report):
+    linker = reference_linker.ReferenceLinker()
+    linker.build_symbol_map()
+    tracker.write_report(linker.link_text(report))
 
 def main():
     parser = argparse.ArgumentParser(description="Unified Agent Ops Hook")
@@ -58,18 +71,29 @@ def main():
     
     if log_args:
         print(f"-> Logging event...")
-        if not run_script("agent_logger.py", log_args):
+        ok, _ = run_step("agent_logger", agent_logger.main, log_args)
+        if not ok:
             print("Failed to log event.")
             sys.exit(1)
 
     # 2. Key Knowledge Phase
+    # The report stays in memory and is written once, after linking.
     print(f"-> Updating Knowledge Tracker...")
-    if not run_script("knowledge_tracker.py", []):
+    ok, built = run_step("knowledge_tracker", build_report)
+    tracker, report = built if ok else (None, None)
+    if not ok:
         print("Failed to update knowledge.")
 
     # 3. Context Linking Phase
     print(f"-> Linking References...")
-    if not run_script("reference_linker.py", []):
+    if report is None:
+        # Nothing new in memory: link whatever is on disk
+        ok, _ = run_step("reference_linker", reference_linker.main)
+    else:
+        ok, _ = run_step("reference_linker", link_and_write, tracker, report)
+        if not ok:
+            tracker.write_report(report) # Keep the knowledge update, just unlinked
+    if not ok:
         print("Failed to link references.")
         
     print("Done. Agent state synced.")
@@ -4,36 +4,117 @@ Agent Logger.
 
 This script logs agent actions (thoughts, code edits, reads) to a chronological JSONL file.
 It serves as the "black box" recorder for the agent's session.
+
+Set `AGENT_LOG_FORMAT=bin` to record length-prefixed MessagePack frames
+(`AGENT_TRACE.bin`, requires `msgpack`) instead of human-readable JSONL.
 """
 
 import os
-import json
+import sys
+import atexit
 import argparse
 import time
-from datetime import datetime
+
+# Ensure we can import sibling
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+import fast_json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+LOG_FORMAT_ENV = "AGENT_LOG_FORMAT"
+TRACE_FILES = {
+    "json": "AGENT_TRACE.jsonl",
+    "bin": "AGENT_TRACE.bin",
+}
+
+def get_log_format() -> str:
+    """Returns the trace format selected via AGENT_LOG_FORMAT ('json' by default)."""
+    fmt = os.environ.get(LOG_FORMAT_ENV, "json").strip().lower()
+    if fmt not in TRACE_FILES:
+        print(f"Warning: Unknown {LOG_FORMAT_ENV} '{fmt}'. Using json.")
+        return "json"
+    if fmt == "bin" and msgpack is None:
+        print(f"Warning: {LOG_FORMAT_ENV}=bin requires msgpack (pip install msgpack). Using json.")
+        return "json"
+    return fmt
 
 class AgentLogger:
-    def __init__(self, log_dir: str = "logs"):
+    trace_name = TRACE_FILES["json"]
+    FLUSH_THRESHOLD = 4096 # Bytes buffered before one os.write
+
+    def __init__(self, log_dir: str = "logs", flush_every_n: int = 0):
         self.log_dir = log_dir
         if not os.path.exists(self.log_dir):
             os.makedirs(self.log_dir)
-        self.log_file = os.path.join(self.log_dir, "AGENT_TRACE.jsonl")
+        self.log_file = os.path.join(self.log_dir, self.trace_name)
+        # Raw append-only fd + our own byte buffer: no file object layers,
+        # one os.write per FLUSH_THRESHOLD bytes instead of a syscall cycle per event.
+        # flush_every_n > 0 trades some throughput for crash tolerance.
+        self.flush_every_n = flush_every_n
+        self._pending = 0
+        self._buf = bytearray()
+        self._fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        atexit.register(self.close)
+
+    def _encode(self, entry: dict) -> bytes:
+        return fast_json.dumpb(entry) + b"\n"
 
     def log(self, event_type: str, content: str, meta: dict = None):
+        # Raw epoch nanoseconds; human-readable times are rendered by the tracker
         entry = {
-            "timestamp": datetime.now().isoformat(),
-            "timestamp_unix": time.time(),
+            "ts_ns": time.time_ns(),
             "type": event_type,
             "content": content,
             "meta": meta or {}
         }
         
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(entry) + "\n")
+        self._buf += self._encode(entry)
+        self._pending += 1
+        if (len(self._buf) >= self.FLUSH_THRESHOLD
+                or (self.flush_every_n and self._pending >= self.flush_every_n)):
+            self.flush()
             
         print(f"Logged [{event_type}]: {content[:50]}...")
 
-def main():
+    def flush(self):
+        if self._buf and self._fd is not None:
+            written = os.write(self._fd, self._buf)
+            while written < len(self._buf):
+                written += os.write(self._fd, self._buf[written:])
+            self._buf.clear()
+        self._pending = 0
+
+    def close(self):
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+class BinLogger(AgentLogger):
+    """Same API as AgentLogger, but writes 4-byte little-endian length-prefixed msgpack frames."""
+    trace_name = TRACE_FILES["bin"]
+
+    def __init__(self, log_dir: str = "logs", flush_every_n: int = 0):
+        if msgpack is None:
+            raise ImportError("BinLogger requires msgpack (pip install msgpack)")
+        super().__init__(log_dir, flush_every_n)
+
+    def _encode(self, entry: dict) -> bytes:
+        buf = msgpack.packb(entry)
+        return len(buf).to_bytes(4, 'little') + buf
+
+def create_logger(log_dir: str = "logs") -> AgentLogger:
+    """Builds the logger matching AGENT_LOG_FORMAT."""
+    if get_log_format() == "bin":
+        return BinLogger(log_dir)
+    return AgentLogger(log_dir)
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Log agent events.")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -52,11 +133,11 @@ def main():
     parser_edit.add_argument("--file", "-f", required=True, help="File edited")
     parser_edit.add_argument("--desc", "-d", required=True, help="Description of edit")
     
-    args = parser.parse_args()
-    logger = AgentLogger()
+    args = parser.parse_args(argv)
+    logger = create_logger()
 
     if args.command == "log":
-        meta = json.loads(args.meta) if args.meta else {}
+        meta = fast_json.loads(args.meta) if args.meta else {}
         logger.log(args.type, args.content, meta)
         
     elif args.command == "hypothesis":
@@ -65,5 +146,8 @@ def main():
     elif args.command == "edit":
         logger.log("edit", args.desc, {"file": args.file})
 
+    # Single flush per CLI invocation so readers (e.g. the tracker) see the event
+    logger.close()
+
 if __name__ == "__main__":
     main()
@@ -11,11 +11,13 @@ To generate context-aware comments for undocumented code.
 """
 
 import os
-import json
+import mmap
 import glob
 import argparse
 import sys
-from typing import List, Dict, Optional
+import functools
+from collections import Counter
+from typing import TYPE_CHECKING, List, Dict, Optional
 
 # --- Import Custom Modules ---
 # Ensure we can find sibling modules even if running from elsewhere
@@ -24,24 +26,54 @@ if script_dir not in sys.path:
     sys.path.append(script_dir)
 
 try:
-    import semantic_analyzer
-    from semantic_analyzer import VariableInfo
+    from fs_utils import get_cpp_files, read_text
+    import fast_json
 except ImportError as e:
-    print(f"Error: Could not import semantic_analyzer. Make sure it is in {script_dir}")
+    print(f"Error: Could not import sibling modules ({e}). Make sure they are in {script_dir}")
     sys.exit(1)
 
-# --- Domain Knowledge ---
+# semantic_analyzer is imported on first use (see _semantic_analyzer), so that
+# --help, bad arguments and empty scans never pay for it.
+semantic_analyzer = None
+if TYPE_CHECKING:
+    from semantic_analyzer import VariableInfo
+
+def _semantic_analyzer():
+    global semantic_analyzer
+    if semantic_analyzer is None:
+        import semantic_analyzer as _sa
+        semantic_analyzer = _sa
+    return semantic_analyzer
 
-DOMAIN_DICTIONARY = {}
+def load_json_mmap(path: str):
+    """Parses a JSON file directly from a read-only memory map of it."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            return fast_json.loads(mm[:])
+    finally:
+        os.close(fd)
+
+# Optional: linear-time multi-substring matching for large domain dictionaries
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# --- Domain Knowledge ---
 
-# Load domain dictionary from JSON if available
 domain_file = os.path.join(script_dir, "domain.json")
-if os.path.exists(domain_file):
+
+@functools.lru_cache(maxsize=None)
+def get_domain_dictionary(path: str = domain_file) -> Dict[str, str]:
+    """Loads the domain dictionary from JSON on first use; later calls (and forked workers) reuse it."""
+    if not os.path.exists(path):
+        return {}
     try:
-        with open(domain_file, 'r', encoding='utf-8') as f:
-            DOMAIN_DICTIONARY = json.load(f)
+        return load_json_mmap(path)
     except Exception as e:
-        print(f"Warning: Error loading domain.json: {e}. Proceeding with empty domain knowledge.")
+        print(f"Warning: Error loading {os.path.basename(path)}: {e}. Proceeding with empty domain knowledge.")
+        return {}
 
 OPERATOR_DESCRIPTIONS = {
     "&": "Bitwise MASK",
@@ -51,10 +83,15 @@ OPERATOR_DESCRIPTIONS = {
     "%": "Modulo / Wrap Around"
 }
 
+# Precomputed (operator, comment) pairs; the first operator (in
+# OPERATOR_DESCRIPTIONS order) contained in a value wins.
+_OPERATOR_COMMENTS = tuple((op, f"// {desc} operation") for op, desc in OPERATOR_DESCRIPTIONS.items())
+
 # --- Generation Logic ---
 
 class CommentGenerator:
-    def __init__(self, pattern_filename: str = "comment_patterns.json"):
+    def __init__(self, pattern_filename: str = "comment_patterns.json", domain_path: str = domain_file):
+        self.domain = get_domain_dictionary(domain_path)
         self.patterns = {}
         # Look for pattern file in script directory
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -62,50 +99,70 @@ class CommentGenerator:
         
         if os.path.exists(pattern_path):
             try:
-                with open(pattern_path, 'r', encoding='utf-8') as f:
-                    self.patterns = json.load(f)
+                self.patterns = load_json_mmap(pattern_path)
             except Exception as e:
                  print(f"Warning: Failed to load patterns from {pattern_path}: {e}")
         else:
             # Silent warning if using defaults, usually fine
             pass
 
-    def generate_for_var(self, var: VariableInfo) -> Optional[str]:
+        # Most common learned comment per variable type, counted once
+        self._top_by_type = {
+            t: Counter(pats).most_common(1)[0][0]
+            for t, pats in self.patterns.get("variable", {}).items() if pats
+        }
+
+        # Domain keys sorted once, longest first (ties keep dictionary order).
+        # Digit keys only ever match values, never names.
+        keys = sorted((k for k in self.domain if not k.isdigit()), key=len, reverse=True)
+        self._long_keys = [k for k in keys if len(k) >= 3]
+        self._short_keys = [k for k in keys if len(k) < 3]
+        self._automaton = None
+        if ahocorasick is not None and self._long_keys:
+            self._automaton = ahocorasick.Automaton()
+            for rank, key in enumerate(self._long_keys):
+                self._automaton.add_word(key, rank)
+            self._automaton.make_automaton()
+
+    def _match_domain_key(self, name_lower: str) -> Optional[str]:
+        """Returns the first domain key (longest first) that matches a lowercased name."""
+        # For longer keys, allow containment
+        if self._automaton is not None:
+            rank = min((r for _, r in self._automaton.iter(name_lower)), default=None)
+            if rank is not None:
+                return self._long_keys[rank]
+        else:
+            for key in self._long_keys:
+                if key in name_lower:
+                    return key
+        
+        # For short keys (<3 chars), require exact match or word boundary (simplified)
+        for key in self._short_keys:
+            if key == name_lower or f"_{key}" in name_lower or f"{key}_" in name_lower:
+                return key
+        return None
+
+    def generate_for_var(self, var: "VariableInfo") -> Optional[str]:
         """Generate a comment for a variable declaration."""
         
         # 1. Dictionary Lookup (Highest Priority)
         # Check specific values
-        if var.value and var.value.strip() in DOMAIN_DICTIONARY:
-            desc = DOMAIN_DICTIONARY[var.value.strip()]
+        if var.value and var.value.strip() in self.domain:
+            desc = self.domain[var.value.strip()]
             return f"// {desc}"
             
         # Check variable name parts
         name_lower = var.name.lower()
-        # Sort keys by length desc to match longest terms first
-        sorted_keys = sorted(DOMAIN_DICTIONARY.keys(), key=len, reverse=True)
-        
-        for key in sorted_keys:
-            desc = DOMAIN_DICTIONARY[key]
-            if key.isdigit(): continue
-            
-            # For short keys (<3 chars), require exact match or word boundary (simplified)
-            if len(key) < 3:
-                if key == name_lower or f"_{key}" in name_lower or f"{key}_" in name_lower:
-                     return f"// {desc} ({var.name})"
-            # For longer keys, allow containment
-            elif key in name_lower:
-                 return f"// {desc} ({var.name})"
+        key = self._match_domain_key(name_lower)
+        if key is not None:
+            return f"// {self.domain[key]} ({var.name})"
 
         # 2. Pattern Matching (Learned from codebase)
         # Check if we have learned patterns for this type
-        if "variable" in self.patterns:
-            type_patterns = self.patterns["variable"].get(var.type, [])
-            if type_patterns:
-                # Naive: return the most common comment for this type
-                from collections import Counter
-                most_common = Counter(type_patterns).most_common(1)
-                if most_common:
-                    return f"// {most_common[0][0]} (Suggested)"
+        # Naive: return the most common comment for this type
+        top = self._top_by_type.get(var.type)
+        if top is not None:
+            return f"// {top} (Suggested)"
 
         # 3. Heuristic / Type Analysis
         if "flags" in name_lower or "mask" in name_lower:
@@ -114,26 +171,21 @@ class CommentGenerator:
         if var.type.startswith("uint") and "[" in var.type: # Array
              return f"// Buffer for {var.name}"
              
-        if var.value and any(op in var.value for op in OPERATOR_DESCRIPTIONS):
-            for op, desc in OPERATOR_DESCRIPTIONS.items():
-                if op in var.value:
-                    return f"// {desc} operation"
+        if var.value:
+            value = var.value
+            for op, comment in _OPERATOR_COMMENTS:
+                if op in value:
+                    return comment
 
         return None
 
     def analyze_file(self, file_path: str) -> List[str]:
         suggestions = []
         try:
-            # Robust file reading with encoding fallback
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    code = f.read()
-            except UnicodeDecodeError:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    code = f.read()
+            code = read_text(file_path)
             
             # Use Phase 2 Semantic Analyzer
-            extracted_vars = semantic_analyzer.analyze_code(code)
+            extracted_vars = _semantic_analyzer().analyze_code(code)
             
             for var in extracted_vars:
                 # Only suggest if no comment exists? 
@@ -148,22 +200,36 @@ class CommentGenerator:
             
         return suggestions
 
-def get_cpp_files(source_dir: str, excludes: List[str]) -> List[str]:
-    cpp_files = []
-    for root, dirs, files in os.walk(source_dir):
-        # Filter directories in place
-        dirs[:] = [d for d in dirs if d not in excludes and not d.startswith('.')]
-        
-        for file in files:
-            if file.endswith('.cpp') or file.endswith('.h') or file.endswith('.hpp'):
-                cpp_files.append(os.path.join(root, file))
-    return cpp_files
+# --- Parallel Workers ---
+
+# Workers only receive file paths. Each one maps and parses the domain and
+# pattern JSONs once in the initializer, so no dictionaries are pickled per task.
+_worker_generator = None
+
+def _init_worker(domain_path: str, pattern_filename: str):
+    global _worker_generator
+    _worker_generator = CommentGenerator(pattern_filename, domain_path)
+
+def _analyze_in_worker(file_path: str) -> List[str]:
+    return _worker_generator.analyze_file(file_path)
+
+def analyze_files(files: List[str], jobs: int = 1):
+    """Yields the suggestions for each file, in order, using `jobs` worker processes."""
+    if jobs > 1 and len(files) > 1:
+        # Deferred like semantic_analyzer: pulls in multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(domain_file, "comment_patterns.json")) as ex:
+            yield from ex.map(_analyze_in_worker, files, chunksize=16)
+    else:
+        generator = CommentGenerator()
+        yield from map(generator.analyze_file, files)
 
 def main():
     parser = argparse.ArgumentParser(description="Generate comment suggestions for C++ code.")
     parser.add_argument("--source", "-s", default=".", help="Root directory to scan (default: current dir)")
     parser.add_argument("--output", "-o", help="Output report file path (default: scripts/comment_suggestions_report.md)")
     parser.add_argument("--exclude", "-e", default="third-party,vendor,build,scripts", help="Comma-separated folders to exclude")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count, 1 = serial)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Print detailed logs")
     
     args = parser.parse_args()
@@ -181,10 +247,8 @@ def main():
     if args.verbose:
         print(f"Scanning {source_dir}")
         print(f"Excluding: {excludes}")
-        print(f"Domain Dictionary loaded: {len(DOMAIN_DICTIONARY)} items")
+        print(f"Domain Dictionary loaded: {len(get_domain_dictionary())} items")
 
-    generator = CommentGenerator()
-    
     files = get_cpp_files(source_dir, excludes)
     
     if not files:
@@ -195,11 +259,10 @@ def main():
     
     count = 0
     errors = 0
-    for f in files:
+    for f, suggs in zip(files, analyze_files(files, args.jobs)):
         if args.verbose:
-            print(f"Analyzing {f}...")
+            print(f"Analyzed {f}")
             
-        suggs = generator.analyze_file(f)
         if suggs:
             # Check for error messages in suggestions
             has_error = any(s.startswith("Error analyzing") for s in suggs)
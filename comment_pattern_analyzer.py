@@ -21,11 +21,35 @@ import sys
 from collections import defaultdict
 from typing import Dict, List, Any
 
+# Ensure we can import sibling
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+from fs_utils import get_cpp_files, read_text
+
 # Regex patterns for C++ constructs
-RE_FUNC_START = re.compile(r'^([\w:]+)\s+([\w]+)\s*\([^)]*\)\s*{')
-RE_VAR_DECL = re.compile(r'^\s*(static\s+|const\s+)?([\w:<>\*&]+)\s+(\w+)(\[[^\]]+\])?(?:\s*=\s*[^;]+)?;')
-RE_CONTROL_FLOW = re.compile(r'^\s*(if|for|while|switch|else)\s*\(?')
-RE_STRUCT_CLASS = re.compile(r'^\s*(struct|class|enum)\s+(\w+)')
+PAT_FUNC_START = r'^([\w:]+)\s+([\w]+)\s*\([^)]*\)\s*{'
+PAT_VAR_DECL = r'^\s*(static\s+|const\s+)?(?P<var_type>[\w:<>\*&]+)\s+(\w+)(\[[^\]]+\])?(?:\s*=\s*[^;]+)?;'
+PAT_CONTROL_FLOW = r'^\s*(?P<keyword>if|for|while|switch|else)\s*\(?'
+PAT_STRUCT_CLASS = r'^\s*(struct|class|enum)\s+(\w+)'
+
+RE_FUNC_START = re.compile(PAT_FUNC_START)
+RE_VAR_DECL = re.compile(PAT_VAR_DECL)
+RE_CONTROL_FLOW = re.compile(PAT_CONTROL_FLOW)
+RE_STRUCT_CLASS = re.compile(PAT_STRUCT_CLASS)
+
+def _fuse(**alternatives) -> re.Pattern:
+    """Fuses patterns into one alternation; `match.lastgroup` names the first one that matched."""
+    return re.compile('|'.join(f'(?P<{name}>{pat})' for name, pat in alternatives.items()))
+
+# One regex call per classification. Each call site checks a different subset
+# of constructs in its own priority order, so each gets its own fused pattern.
+RE_AFTER_BLOCK = _fuse(func=PAT_FUNC_START, struct=PAT_STRUCT_CLASS)
+RE_AFTER_LINE_COMMENT = _fuse(control=PAT_CONTROL_FLOW, func=PAT_FUNC_START)
+RE_BEFORE_EOL_COMMENT = _fuse(var=PAT_VAR_DECL, control=PAT_CONTROL_FLOW)
+
+# How many upcoming lines we look at to find the code a comment documents
+LOOKAHEAD = 5
 
 class PatternLearner:
     def __init__(self):
@@ -45,58 +69,66 @@ class PatternLearner:
     def analyze_file(self, file_path: str):
         self.stats["files_scanned"] += 1
         try:
-            # Robust file reading
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-            except UnicodeDecodeError:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    lines = f.readlines()
+            text = read_text(file_path)
         except Exception as e:
             # print(f"Error reading {file_path}: {e}")
             return
 
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        # Strip every line once, then classify in a single pass.
+        # in_block tracks whether we are inside a /* ... */ comment.
+        # Split on '\n' only: str.splitlines() also breaks on form feeds etc.
+        lines = text.split('\n')
+        if not lines[-1]:
+            lines.pop()
+        stripped = [l.strip() for l in lines]
+        in_block = False
+        comment_block = []
+        for i, line in enumerate(stripped):
+            if in_block:
+                comment_block.append(line)
+                if '*/' in line:
+                    in_block = False
+                    self._classify_block_comment(comment_block, stripped, i + 1)
             
             # 1. Block Comments (/** ... */)
-            if line.startswith('/*'):
-                comment_block = []
-                while i < len(lines):
-                    l_strip = lines[i].strip()
-                    comment_block.append(l_strip)
-                    if '*/' in l_strip:
-                        break
-                    i += 1
-                self._classify_block_comment(comment_block, lines, i + 1)
+            elif line.startswith('/*'):
+                comment_block = [line]
+                if '*/' in line:
+                    self._classify_block_comment(comment_block, stripped, i + 1)
+                else:
+                    in_block = True
             
             # 2. Inline Comments (// ...)
             elif '//' in line:
-                self._classify_inline_comment(line, lines, i)
-            
-            i += 1
+                self._classify_inline_comment(line, stripped, i)
+
+        # Unterminated block comment runs to end of file
+        if in_block:
+            self._classify_block_comment(comment_block, stripped, len(stripped) + 1)
 
-    def _classify_block_comment(self, comment_block: List[str], all_lines: List[str], next_line_idx: int):
+    def _classify_block_comment(self, comment_block: List[str], stripped: List[str], next_line_idx: int):
         self.stats["comments_found"] += 1
         full_text = "\n".join(comment_block)
         
         # Check context immediately following the comment
         next_code_line = ""
-        for j in range(next_line_idx, min(len(all_lines), next_line_idx + 5)):
-            clean = all_lines[j].strip()
+        for clean in stripped[next_line_idx:next_line_idx + LOOKAHEAD]:
             if clean and not clean.startswith('//') and not clean.startswith('/*'):
                 next_code_line = clean
                 break
 
-        if "@file" in full_text or next_line_idx < 10:
+        is_header = "@file" in full_text or next_line_idx < 10
+        m = None if is_header else RE_AFTER_BLOCK.match(next_code_line)
+        kind = m.lastgroup if m else None
+
+        if is_header:
             self.patterns["header"].append(full_text)
-        elif RE_FUNC_START.match(next_code_line):
+        elif kind == "func":
             self.patterns["function"].append({
                 "comment": full_text,
                 "signature": next_code_line
             })
-        elif RE_STRUCT_CLASS.match(next_code_line):
+        elif kind == "struct":
              self.patterns["data_structures"].append({
                 "comment": full_text,
                 "struct": next_code_line
@@ -104,7 +136,7 @@ class PatternLearner:
         else:
              self.patterns["general"].append(full_text)
 
-    def _classify_inline_comment(self, line: str, all_lines: List[str], line_idx: int):
+    def _classify_inline_comment(self, line: str, stripped: List[str], line_idx: int):
         self.stats["comments_found"] += 1
         parts = line.split('//', 1)
         code_part = parts[0].strip()
@@ -115,17 +147,18 @@ class PatternLearner:
         # Case A: Comment on its own line -> look at next line
         if not code_part:
             next_code_line = ""
-            for j in range(line_idx + 1, min(len(all_lines), line_idx + 5)):
-                clean = all_lines[j].strip()
+            for clean in stripped[line_idx + 1:line_idx + LOOKAHEAD]:
                 if clean and not clean.startswith('//'):
                     next_code_line = clean
                     break
             
+            m = RE_AFTER_LINE_COMMENT.match(next_code_line)
+            kind = m.lastgroup if m else None
             # Logic flow?
-            if m := RE_CONTROL_FLOW.match(next_code_line):
-                self.patterns["control_flow"][m.group(1)].append(comment_part)
+            if kind == "control":
+                self.patterns["control_flow"][m.group("keyword")].append(comment_part)
             # Function?
-            elif RE_FUNC_START.match(next_code_line):
+            elif kind == "func":
                 self.patterns["function"].append({"comment": comment_part, "signature": next_code_line})
             else:
                 self.patterns["general"].append(comment_part)
@@ -133,11 +166,13 @@ class PatternLearner:
 
         # Case B: End-of-line comment
         # Variable declaration?
-        if m := RE_VAR_DECL.match(code_part):
-            var_type = m.group(2)
+        m = RE_BEFORE_EOL_COMMENT.match(code_part)
+        kind = m.lastgroup if m else None
+        if kind == "var":
+            var_type = m.group("var_type")
             self.patterns["variable"][var_type].append(comment_part)
-        elif m := RE_CONTROL_FLOW.match(code_part):
-            self.patterns["control_flow"][m.group(1)].append(comment_part)
+        elif kind == "control":
+            self.patterns["control_flow"][m.group("keyword")].append(comment_part)
         else:
              self.patterns["general"].append(comment_part)
 
@@ -159,17 +194,6 @@ class PatternLearner:
         except Exception as e:
             print(f"Error saving report to {output_path}: {e}")
 
-def get_cpp_files(source_dir: str, excludes: List[str]) -> List[str]:
-    cpp_files = []
-    for root, dirs, files in os.walk(source_dir):
-        # Filter directories in place
-        dirs[:] = [d for d in dirs if d not in excludes and not d.startswith('.')]
-        
-        for file in files:
-            if file.endswith('.cpp') or file.endswith('.h') or file.endswith('.hpp'):
-                cpp_files.append(os.path.join(root, file))
-    return cpp_files
-
 def main():
     parser = argparse.ArgumentParser(description="Learn comment patterns from existing C++ code.")
     parser.add_argument("--source", "-s", default=".", help="Root directory to scan (default: current dir)")
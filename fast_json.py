@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Fast JSON helpers.
+
+Uses `orjson` when it is installed and falls back to the standard library
+`json` module otherwise. Both backends read each other's output.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumpb(obj) -> bytes:
+        """Serializes `obj` to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj)
+else:
+    loads = json.loads
+
+    def dumpb(obj) -> bytes:
+        """Serializes `obj` to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps(obj) -> str:
+    return dumpb(obj).decode('utf-8')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+File System Utilities.
+
+Shared helpers for locating and reading C++ sources and for atomic
+writes, used by the pattern analyzer, the comment generator, the knowledge
+tracker and the reference linker.
+"""
+
+import os
+from typing import Iterator, List
+
+CPP_EXTENSIONS = ('.cpp', '.h', '.hpp')
+
+def iter_cpp_files(root: str, excludes: List[str]) -> Iterator[str]:
+    """
+    Yields C++ files under `root`, skipping excluded and hidden directories.
+
+    Uses os.scandir so type checks come from the cached DirEntry instead of
+    extra stat calls. Order matches os.walk: a directory's files first, then
+    its subdirectories. Symlinked directories are not followed.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if entry.name in excludes or entry.name.startswith('.') or entry.is_symlink():
+                continue
+            subdirs.append(entry.path)
+        elif entry.name.endswith(CPP_EXTENSIONS):
+            yield entry.path
+
+    for path in subdirs:
+        yield from iter_cpp_files(path, excludes)
+
+def get_cpp_files(source_dir: str, excludes: List[str]) -> List[str]:
+    return list(iter_cpp_files(source_dir, excludes))
+
+def read_text(path: str) -> str:
+    """
+    Reads a whole file (one os.read in the common case) and decodes it once
+    as UTF-8.
+
+    Undecodable bytes become U+FFFD rather than failing. CRLF and lone CR
+    line endings become LF, as they do in text-mode reads.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        raw = os.read(fd, size)
+        # One read is the common case, but it may come back short (Linux caps
+        # a single read near 2 GiB)
+        if len(raw) < size:
+            parts = [raw]
+            got = len(raw)
+            while got < size:
+                chunk = os.read(fd, size - got)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                got += len(chunk)
+            raw = b''.join(parts)
+    finally:
+        os.close(fd)
+    if b'\r' in raw:
+        raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return raw.decode('utf-8', 'replace')
+
+def write_atomic(path: str, data: bytes):
+    """
+    Writes `data` to `path` through a uniquely named temp file in the same
+    directory and os.replace, so readers never see a half-written file and
+    concurrent writers never share a temp file.
+    """
+    import tempfile # Only writers need it; keeps read-only tools' startup lean
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates the file 0600; keep the target's mode (or 0644)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -8,71 +8,171 @@ the agent's evolving mental model.
 """
 
 import os
-import json
+import sys
+import mmap
 import argparse
-from typing import List, Dict
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Tuple
+
+# Ensure we can import sibling
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+import fast_json
+from agent_logger import TRACE_FILES, get_log_format, msgpack
+from fs_utils import write_atomic
 
 class KnowledgeTracker:
+    STATE_VERSION = 3
+    MAX_THOUGHTS = 10
+
     def __init__(self, log_dir: str = "logs"):
-        self.log_file = os.path.join(log_dir, "AGENT_TRACE.jsonl")
+        self.log_format = get_log_format()
+        self.log_file = os.path.join(log_dir, TRACE_FILES[self.log_format])
         self.output_file = "CURRENT_UNDERSTANDING.md"
+        # Pre-rendered report lines + byte offset, so each run only parses new events
+        self.state_file = os.path.join(log_dir, ".tracker_state.json")
+        self.event_count = 0
 
     def read_logs(self) -> List[Dict]:
-        if not os.path.exists(self.log_file):
-            return []
-        
-        entries = []
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            for line in f:
+        """Reads every entry in the trace."""
+        return [e for e, _ in self._iter_entries(0) if e is not None]
+
+    def _iter_entries(self, offset: int) -> Iterator[Tuple[Optional[Dict], int]]:
+        """
+        Yields (entry, resume_offset) for each complete record from byte `offset` on.
+        Malformed records yield None so the caller still advances past them.
+        """
+        if not os.path.exists(self.log_file) or os.path.getsize(self.log_file) <= offset:
+            return
+        with open(self.log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if self.log_format == "bin":
+                yield from self._iter_frames(mm, offset)
+                return
+            
+            mm.seek(offset)
+            for line in iter(mm.readline, b""):
+                if not line.endswith(b"\n"):
+                    break # Partial trailing line, pick it up next run
+                offset += len(line)
+                entry = None
                 if line.strip():
                     try:
-                        entries.append(json.loads(line))
+                        entry = fast_json.loads(line)
                     except: 
                         pass
-        return entries
+                yield entry, offset
+
+    @staticmethod
+    def _iter_frames(mm: mmap.mmap, pos: int) -> Iterator[Tuple[Optional[Dict], int]]:
+        """Walks length-prefixed msgpack frames written by BinLogger."""
+        total = len(mm)
+        while pos + 4 <= total:
+            size = int.from_bytes(mm[pos:pos + 4], 'little')
+            end = pos + 4 + size
+            if end > total:
+                break # Truncated trailing frame (writer crashed mid-write)
+            try:
+                entry = msgpack.unpackb(mm[pos + 4:end])
+            except Exception:
+                entry = None
+            pos = end
+            yield entry, pos
+
+    def _load_state(self) -> Dict:
+        fresh = {
+            "version": self.STATE_VERSION,
+            "log_file": self.log_file,
+            "last_offset": 0,
+            "event_count": 0,
+            "hypotheses_md": [],
+            "thoughts": [],
+            "edits_md": []
+        }
+        try:
+            with open(self.state_file, 'rb') as f:
+                state = fast_json.loads(f.read())
+        except (OSError, ValueError):
+            return fresh
+        
+        # Start over if the state belongs to another trace or the trace was truncated/rotated
+        if (state.get("version") != self.STATE_VERSION
+                or state.get("log_file") != self.log_file
+                or not os.path.exists(self.log_file)
+                or state.get("last_offset", 0) > os.path.getsize(self.log_file)):
+            return fresh
+        return state
+
+    def _save_state(self, state: Dict):
+        write_atomic(self.state_file, fast_json.dumpb(state))
+
+    @staticmethod
+    def _short_time(entry: Dict) -> str:
+        """Renders an entry's time as HH:MM:SS (local time)."""
+        if 'ts_ns' in entry:
+            return datetime.fromtimestamp(entry['ts_ns'] / 1e9).strftime('%H:%M:%S')
+        # Older traces: "2024-01-01T12:34:56.789" -> "12:34:56"
+        return entry.get('timestamp', '').partition('T')[2].split('.')[0]
 
     def generate_report(self):
-        entries = self.read_logs()
-        if not entries:
+        report = self.generate_report_str()
+        if report is None:
             print("No logs found.")
             return
+        self.write_report(report)
+        print(f"Updated {self.output_file} based on {self.event_count} events.")
 
-        hypotheses = [e for e in entries if e['type'] == 'hypothesis']
-        recent_thoughts = [e for e in entries if e['type'] == 'thought'][-10:] # Last 10
-        edits = [e for e in entries if e['type'] == 'edit']
+    def write_report(self, report: str):
+        """Writes the report atomically (readers never see a half-written file)."""
+        write_atomic(self.output_file, report.encode('utf-8'))
+
+    def generate_report_str(self) -> Optional[str]:
+        """Folds new trace events into the saved state and returns the report text (None if no logs)."""
+        state = self._load_state()
+        
+        # Single pass over the mapped trace: hypotheses/edits are rendered as they are read
+        hyp_md = state["hypotheses_md"]
+        # Thoughts keep only time + content; they are rendered after the window is final
+        thoughts = deque(state["thoughts"], maxlen=self.MAX_THOUGHTS)
+        edit_md = state["edits_md"]
+        for e, offset in self._iter_entries(state["last_offset"]):
+            state["last_offset"] = offset
+            if e is None:
+                continue
+            state["event_count"] += 1
+            e_type = e.get('type')
+            if e_type == 'hypothesis':
+                hyp_md.append(f"- [{self._short_time(e)}] **{e['content']}**")
+            elif e_type == 'thought':
+                thoughts.append({k: e[k] for k in ('ts_ns', 'timestamp', 'content') if k in e})
+            elif e_type == 'edit':
+                f_name = e.get('meta', {}).get('file', 'unknown')
+                edit_md.append(f"- Modified `{f_name}`: {e['content']}")
+        state["thoughts"] = list(thoughts)
         
+        self.event_count = state["event_count"]
+        if not self.event_count:
+            return None
+
         lines = ["# Current Agent Understanding\n"]
         
-        # 1. Active Hypotheses
+        # 1. Active Hypotheses (newest first)
         lines.append("## Active Hypotheses")
-        if hypotheses:
-            for i, h in enumerate(reversed(hypotheses)): # Newest first
-                ts = h.get('timestamp', '').split('T')[1].split('.')[0]
-                lines.append(f"- [{ts}] **{h['content']}**")
-        else:
-            lines.append("_No active hypotheses recorded._")
+        lines.extend(reversed(hyp_md) if hyp_md else ["_No active hypotheses recorded._"])
         lines.append("")
 
         # 2. Recent Thoughts
         lines.append("## Recent Chain-of-Thought")
-        for t in recent_thoughts:
-            ts = t.get('timestamp', '').split('T')[1].split('.')[0]
-            lines.append(f"> [{ts}] {t['content']}")
+        lines.extend(f"> [{self._short_time(t)}] {t['content']}" for t in thoughts)
         lines.append("")
         
         # 3. Work Log (Edits)
         lines.append("## Code Changes")
-        if edits:
-            for e in edits:
-                f_name = e.get('meta', {}).get('file', 'unknown')
-                lines.append(f"- Modified `{f_name}`: {e['content']}")
-        else:
-             lines.append("_No code changes recorded yet._")
+        lines.extend(edit_md if edit_md else ["_No code changes recorded yet._"])
 
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            f.write("\n".join(lines))
-            
-        print(f"Updated {self.output_file} based on {len(entries)} events.")
+        self._save_state(state)
+        return "\n".join(lines)
 
 def main():
     tracker = KnowledgeTracker()
@@ -18,49 +18,81 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 import semantic_analyzer
+import fast_json
+from fs_utils import get_cpp_files, write_atomic
+
+# Simple regex for Class/Struct/Enum definitions
+IDX_REGEX = re.compile(r'^\s*(class|struct|enum)\s+(\w+)')
 
 class ReferenceLinker:
+    CACHE_VERSION = 1
+
     def __init__(self, root_dir: str = "."):
         self.root_dir = root_dir
         self.symbol_map = {} # Name -> (File, Line)
+        # Per-file symbols keyed by (mtime, size) so warm runs only re-scan changed files
+        self.cache_path = os.path.join(root_dir, ".symbol_cache.json")
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = fast_json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != self.CACHE_VERSION:
+            return {}
+        return cache.get("files", {})
+
+    def _save_cache(self, files: dict):
+        try:
+            write_atomic(self.cache_path, fast_json.dumpb({"version": self.CACHE_VERSION, "files": files}))
+        except OSError as e:
+            print(f"Warning: Could not write symbol cache {self.cache_path}: {e}")
+
+    def _scan_file(self, f_path: str) -> list:
+        # The semantic_analyzer focuses on variables inside scopes, so for this
+        # 'linker' prototype a quick regex scan for definitions is enough.
+        with open(f_path, 'r', encoding='utf-8', errors='ignore') as f:
+            code = f.read()
+        
+        symbols = []
+        for i, line in enumerate(code.splitlines()):
+            if m := IDX_REGEX.match(line):
+                symbols.append((m.group(2), i + 1))
+        return symbols
 
     def build_symbol_map(self):
         """Scans C++ files to build a map of class/struct/function names."""
         ignore = ["third-party", "vendor", "build"]
-        cpp_files = []
-        for root, dirs, files in os.walk(self.root_dir):
-            dirs[:] = [d for d in dirs if d not in ignore and not d.startswith('.')]
-            for f in files:
-                if f.endswith(('.cpp', '.h', '.hpp')):
-                    cpp_files.append(os.path.join(root, f))
+        cpp_files = get_cpp_files(self.root_dir, ignore)
         
         print(f"Indexing symbols from {len(cpp_files)} files...")
         
+        cached = self._load_cache()
+        files_cache = {}
+        rescanned = 0
         for f_path in cpp_files:
             try:
-                # Use our semantic analyzer
-                with open(f_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    code = f.read()
-                
-                # We can reuse the tokenizer/parser logic, but specifically we want definitions
-                # The semantic_analyzer.analyze_code returns variables. 
-                # We might need to extend it or just do a quick regex scan for this 'linker' prototype
-                # For robustness, let's use a simplified regex approach here 
-                # as the semantic analyzer is focused on variables inside scopes.
+                st = os.stat(f_path)
+                entry = cached.get(f_path)
+                if entry and entry[0] == st.st_mtime and entry[1] == st.st_size:
+                    symbols = entry[2]
+                else:
+                    symbols = self._scan_file(f_path)
+                    rescanned += 1
+                files_cache[f_path] = [st.st_mtime, st.st_size, symbols]
                 
-                # Simple regex for Class/Struct/Function
-                idx_regex = re.compile(r'^\s*(class|struct|enum)\s+(\w+)')
-                lines = code.splitlines()
-                for i, line in enumerate(lines):
-                    if m := idx_regex.match(line):
-                        name = m.group(2)
-                        # Store relative path for markdown
-                        rel_path = os.path.relpath(f_path, start=".")
-                        self.symbol_map[name] = (rel_path, i + 1)
+                # Store relative path for markdown
+                rel_path = os.path.relpath(f_path, start=".")
+                for name, line in symbols:
+                    self.symbol_map[name] = (rel_path, line)
                         
             except Exception:
                 continue
-        print(f"Indexed {len(self.symbol_map)} symbols.")
+        
+        if rescanned or files_cache.keys() != cached.keys():
+            self._save_cache(files_cache)
+        print(f"Indexed {len(self.symbol_map)} symbols ({rescanned} files re-scanned).")
 
     def link_file(self, target_file: str):
         if not os.path.exists(target_file):
@@ -70,31 +102,39 @@ class ReferenceLinker:
         with open(target_file, 'r', encoding='utf-8') as f:
             content = f.read()
             
+        new_content = self.link_text(content)
+        if new_content != content:
+            write_atomic(target_file, new_content.encode('utf-8'))
+            print(f"Linked symbols in {target_file}")
+        else:
+            print("No new links added.")
+
+    def link_text(self, content: str) -> str:
+        """Returns `content` with known symbols turned into markdown links."""
         # Naive replacement: specific enough to avoid replacing common words
-        # Only replace if word boundary
+        # Only replace if word boundary. Skip short ones to avoid noise.
+        symbols = [sym for sym in self.symbol_map if len(sym) >= 4]
         
         new_content = content
-        for symbol, (path, line) in self.symbol_map.items():
-            if len(symbol) < 4: continue # Skip short ones to avoid noise
+        if symbols:
+            # One alternation regex, one pass over the content.
+            # Existing markdown links are matched first and kept verbatim so we never
+            # re-link a label or rewrite a path inside a link target.
+            symbols.sort(key=len, reverse=True)
+            big_re = re.compile(
+                r'(\[[^\]]*\]\([^)]*\))|(?<!\[)\b('
+                + '|'.join(re.escape(sym) for sym in symbols) + r')\b'
+            )
             
-            # Regex to find unlinked mentions: \bSymbol\b not preceded by [
-            # This is tricky in regex, simpler:
-            # We construct the link
-            link = f"[{symbol}]({path}#L{line})"
+            def _link(m):
+                if m.group(1):
+                    return m.group(1)
+                symbol = m.group(2)
+                path, line = self.symbol_map[symbol]
+                return f"[{symbol}]({path}#L{line})"
             
-            # If symbol present and not already part of a markdown link
-            if symbol in new_content and link not in new_content:
-                 # Very basic safety: only replace if surrounded by spaces or punctuation
-                 # This is a 'dumb' linker but fits the MVP request
-                 pattern = r'(?<!\[)\b' + re.escape(symbol) + r'\b'
-                 new_content = re.sub(pattern, link, new_content)
-                 
-        if new_content != content:
-            with open(target_file, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            print(f"Linked symbols in {target_file}")
-        else:
-            print("No new links added.")
+            new_content = big_re.sub(_link, content)
+        return new_content
 
 def main():
     linker = ReferenceLinker()
@@ -8,28 +8,151 @@ It does NOT perform full compilation but understands enough structure (scopes, t
 to provide meaningful context.
 """
 
+import functools
 import re
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+import sys
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Compiled tokenizer, when built (cythonize -i semantic_analyzer_fast.pyx)
+try:
+    import semantic_analyzer_fast
+except ImportError:
+    semantic_analyzer_fast = None
 
 # --- Tokenization ---
 
-@dataclass
-class Token:
+class Token(NamedTuple):
     type: str  # 'IDENTIFIER', 'KEYWORD', 'OPERATOR', 'LITERAL', 'COMMENT', 'WHITESPACE'
     value: str
     line: int
     col: int
 
-KEYWORDS = {
+class TokenColumns:
+    """
+    Tokens stored column-wise: parallel type and value lists plus line and
+    col int arrays, instead of one Token tuple (and two int objects) each.
+    """
+    __slots__ = ('types', 'values', 'lines', 'cols')
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.values: List[str] = []
+        self.lines = array('i')
+        self.cols = array('i')
+
+    @classmethod
+    def from_tokens(cls, tokens: List[Token]) -> 'TokenColumns':
+        columns = cls()
+        for token in tokens:
+            columns.types.append(token.type)
+            columns.values.append(token.value)
+            columns.lines.append(token.line)
+            columns.cols.append(token.col)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def token(self, i: int) -> Token:
+        return Token(self.types[i], self.values[i], self.lines[i], self.cols[i])
+
+KEYWORDS = frozenset({
     'int', 'float', 'double', 'char', 'void', 'bool', 'auto', 
     'const', 'static', 'unsigned', 'signed', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t',
     'class', 'struct', 'enum', 'namespace', 'template',
     'if', 'else', 'for', 'while', 'switch', 'case', 'return', 'break',
     'public', 'private', 'protected', 'virtual', 'override'
+})
+
+# Keywords that can open a declaration: the modifiers _try_parse_decl eats
+# and the builtin types. Other keywords (return, class, if, ...) never do,
+# so `return x;` is not read as a variable `x` of type "return". Plain
+# identifiers always qualify (user-defined types).
+_DECL_STARTERS = frozenset({
+    'static', 'const', 'unsigned', 'signed',
+    'int', 'float', 'double', 'char', 'void', 'bool', 'auto',
+    'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t'
+})
+
+# Declaration modifiers -> (sets is_static, sets is_const), one dict probe per token
+_MODIFIERS = {
+    'static': (True, False),
+    'const': (False, True),
+    'unsigned': (False, False),
+    'signed': (False, False),
 }
 
-OPERATORS = set('{}[]()=<>!+-*/%&|^~?:.,;')
+# Tokens that may sit between a parameter list's ')' and a function body '{'
+_FUNC_SUFFIXES = frozenset({'const', 'override', 'final', 'noexcept'})
+
+OPERATORS = frozenset('{}[]()=<>!+-*/%&|^~?:.,;')
+
+_NEWLINE_RE = re.compile(r'\n')
+
+# Master scanner: one alternation, matched in C by the `re` engine.
+# Alternatives are tried in order (space, identifier, number, string,
+# comment, operator); characters matching nothing are skipped.
+# ASCII ranges are listed before \w in classes so `re` tests its 256-bit
+# charset bitmap first and only falls back to the Unicode category lookup
+# for non-ASCII characters; the operator class is a pure bitmap.
+# Comment and string bodies are unrolled into runs of negated classes
+# (`[^\n]*`, `[^*]*`, `[^"\\]*`), each scanned in one tight C loop.
+# Unterminated strings and block comments run to the end of input.
+_TOKEN_RE = re.compile(r"""
+    (?P<WS>\s+)
+  | (?P<IDENT>[^\W\d][A-Za-z0-9_\w]*)
+  | (?P<NUMBER>\d(?:[^\W_]+|\.)*)
+  | (?P<STRING>"[^"\\]*(?:\\[\s\S]?[^"\\]*)*"?|'[^'\\]*(?:\\[\s\S]?[^'\\]*)*'?)
+  | (?P<LCOMMENT>//[^\n]*)
+  | (?P<BCOMMENT>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|/\*[\s\S]*)
+  | (?P<OP>[""" + re.escape(''.join(sorted(OPERATORS))) + r"""])
+""", re.VERBOSE)
+
+# Token type per scanner group, indexed by match.lastindex, so the scan loop
+# dispatches with one tuple lookup; None marks skipped groups
+_GROUP_NAMES = {index: name for name, index in _TOKEN_RE.groupindex.items()}
+_GROUP_TYPES = tuple(
+    {'IDENT': 'IDENTIFIER', 'NUMBER': 'LITERAL', 'STRING': 'LITERAL', 'OP': 'OPERATOR'}
+    .get(_GROUP_NAMES.get(i)) for i in range(_TOKEN_RE.groups + 1)
+)
+
+def _newline_table(code: str) -> List[int]:
+    # Newline offsets, found once in C, framed by -1 and a len(code)
+    # sentinel. Tokens arrive in order, so a scanner only re-resolves its
+    # line (by bisect) once a token starts past the current line's end.
+    newlines = [m.start() for m in _NEWLINE_RE.finditer(code)]
+    newlines.insert(0, -1)
+    newlines.append(len(code))
+    return newlines
+
+def _scan(code: str) -> Iterator[Tuple[str, str, int, int]]:
+    # Pure-Python scanner: the master regex plus one dispatch per match,
+    # yielding plain (type, value, line, col) tuples. The only copy of the
+    # line/col logic outside semantic_analyzer_fast.pyx. Hot-loop names are
+    # bound as locals (LOAD_FAST instead of global lookups).
+    keywords = KEYWORDS
+    group_types = _GROUP_TYPES
+    newlines = _newline_table(code)
+    line = 1
+    line_start = 0
+    line_end = newlines[1]
+    for m in _TOKEN_RE.finditer(code):
+        t_type = group_types[m.lastindex]
+        if t_type is None:
+            continue
+
+        start = m.start()
+        if start > line_end:
+            line = bisect_right(newlines, start, line)
+            line_start = newlines[line - 1] + 1
+            line_end = newlines[line]
+        text = m.group()
+        if t_type == 'IDENTIFIER' and text in keywords:
+            t_type = 'KEYWORD'
+        yield t_type, text, line, start - line_start + 1
 
 class CppTokenizer:
     def __init__(self, code: str):
@@ -40,105 +163,59 @@ class CppTokenizer:
         self.len = len(code)
 
     def tokenize(self) -> List[Token]:
-        tokens = []
-        while self.pos < self.len:
-            char = self.code[self.pos]
-            
-            if char.isspace():
-                if char == '\n':
-                    self.line += 1
-                    self.col = 1
-                else:
-                    self.col += 1
-                self.pos += 1
-                continue
-
-            # Identifiers & Keywords
-            if char.isalpha() or char == '_':
-                start = self.pos
-                self.pos += 1
-                self.col += 1
-                while self.pos < self.len and (self.code[self.pos].isalnum() or self.code[self.pos] == '_'):
-                    self.pos += 1
-                    self.col += 1
-                text = self.code[start:self.pos]
-                t_type = 'KEYWORD' if text in KEYWORDS else 'IDENTIFIER'
-                tokens.append(Token(t_type, text, self.line, self.col - len(text)))
-                continue
+        code = self.code
+        if semantic_analyzer_fast is not None:
+            tokens = semantic_analyzer_fast.tokenize(code, Token, KEYWORDS)
+        else:
+            tokens = list(self._iter_tokens_py(code))
+        self._finish()
+        return tokens
 
-            # Numbers (Hex, Dec, Float - rudimentary)
-            if char.isdigit():
-                start = self.pos
-                while self.pos < self.len and (self.code[self.pos].isalnum() or self.code[self.pos] == '.'):
-                    self.pos += 1
-                    self.col += 1
-                text = self.code[start:self.pos]
-                tokens.append(Token('LITERAL', text, self.line, self.col - len(text)))
-                continue
+    def tokenize_columns(self) -> TokenColumns:
+        """Same tokens as tokenize(), stored as TokenColumns."""
+        code = self.code
+        columns = TokenColumns()
+        if semantic_analyzer_fast is not None:
+            semantic_analyzer_fast.tokenize_columns(
+                code, KEYWORDS, columns.types, columns.values, columns.lines, columns.cols)
+        else:
+            add_type = columns.types.append
+            add_value = columns.values.append
+            add_line = columns.lines.append
+            add_col = columns.cols.append
+            for t_type, text, line, col in _scan(code):
+                add_type(t_type)
+                add_value(text)
+                add_line(line)
+                add_col(col)
+        self._finish()
+        return columns
 
-            # Strings
-            if char == '"' or char == "'":
-                quote = char
-                start = self.pos
-                self.pos += 1
-                self.col += 1
-                while self.pos < self.len:
-                    curr = self.code[self.pos]
-                    if curr == '\\': # Skip escape
-                        self.pos += 2
-                        self.col += 2
-                        continue
-                    if curr == quote:
-                        self.pos += 1
-                        self.col += 1
-                        break
-                    if curr == '\n':
-                        self.line += 1
-                        self.col = 1
-                    else:
-                        self.col += 1
-                    self.pos += 1
-                text = self.code[start:self.pos]
-                tokens.append(Token('LITERAL', text, self.line, self.col - len(text)))
-                continue
+    def _finish(self):
+        # Leave the cursor at the end of input, as after a full scan
+        code = self.code
+        self.pos = self.len
+        self.line = code.count('\n') + 1
+        self.col = self.len - code.rfind('\n')
 
-            # Comments (Skip or Tokenize? Let's skip tokenizing inline for now, assumes comments stripped or handled separately)
-            # For simplicity, we assume Basic Text or Pre-stripped, but let's handle // and /*
-            if char == '/' and self.pos + 1 < self.len:
-                next_char = self.code[self.pos+1]
-                if next_char == '/': # Line comment
-                    start = self.pos
-                    while self.pos < self.len and self.code[self.pos] != '\n':
-                        self.pos += 1
-                    text = self.code[start:self.pos] # Exclude newline
-                    # We skip comments in parser flow usually
-                    continue 
-                elif next_char == '*': # Block comment
-                    start = self.pos
-                    self.pos += 2
-                    while self.pos + 1 < self.len and not (self.code[self.pos] == '*' and self.code[self.pos+1] == '/'):
-                        if self.code[self.pos] == '\n':
-                            self.line += 1
-                            self.col = 1
-                        self.pos += 1
-                    self.pos += 2 # Eat */
-                    continue
+    def iter_tokens(self) -> Iterator[Token]:
+        """
+        Yields tokens one at a time as the source is scanned, for callers
+        that stop early or process tokens as a stream. Same tokens as
+        tokenize(), which builds the full list (with the compiled scanner
+        when available).
+        """
+        return self._iter_tokens_py(self.code)
 
-            # Operators
-            if char in OPERATORS:
-                 tokens.append(Token('OPERATOR', char, self.line, self.col))
-                 self.pos += 1
-                 self.col += 1
-                 continue
-
-            self.pos += 1
-            self.col += 1
-            
-        return tokens
+    @staticmethod
+    def _iter_tokens_py(code: str) -> Iterator[Token]:
+        # Tokens are built with the C-level tuple constructor, skipping the
+        # generated Python __new__
+        return map(functools.partial(tuple.__new__, Token), _scan(code))
 
 # --- Parsing & Context ---
 
-@dataclass
+@dataclass(frozen=True) # Shared between callers via the analyze_code cache
 class VariableInfo:
     name: str
     type: str
@@ -152,127 +229,233 @@ class Scope:
     type: str # 'global', 'function', 'class', 'block'
     name: str = ""
     start_line: int = 0
-    variables: List[VariableInfo] = field(default_factory=list)
+    # Rows in CppParser's var_* columns; most block scopes declare nothing,
+    # so the list is only allocated by the first add_var()
+    variables: Optional[List[int]] = None
+
+    def add_var(self, row: int):
+        if self.variables is None:
+            self.variables = [row]
+        else:
+            self.variables.append(row)
+
+# Bits of CppParser.var_flags
+FLAG_STATIC = 1
+FLAG_CONST = 2
+
+def _match_braces(values: List[str]) -> Dict[int, int]:
+    """Maps the index of each '{' to the index of its matching '}'."""
+    pairs = {}
+    stack = []
+    for i, value in enumerate(values):
+        if value == '{':
+            stack.append(i)
+        elif value == '}' and stack:
+            pairs[stack.pop()] = i
+    return pairs
+
+def _opens_function_body(values: List[str], pos: int) -> bool:
+    # '{' right after a parameter list, e.g. `f(int a) const {`
+    pos -= 1
+    while pos >= 0 and values[pos] in _FUNC_SUFFIXES:
+        pos -= 1
+    return pos >= 0 and values[pos] == ')'
 
 class CppParser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Union[TokenColumns, List[Token]], inside_functions: bool = True):
+        # The parser reads tokens column-wise (see TokenColumns)
+        if not isinstance(tokens, TokenColumns):
+            tokens = TokenColumns.from_tokens(tokens)
         self.tokens = tokens
+        self.inside_functions = inside_functions
         self.pos = 0
         self.scopes = [Scope('global')]
-        self.extracted_vars = []
+        # Extracted variables, stored column-wise: one row per variable
+        # across these parallel columns instead of one object each
+        self.var_names: List[str] = []
+        self.var_types: List[str] = []
+        self.var_values: List[Optional[str]] = []
+        self.var_lines = array('i')
+        self.var_flags = array('B') # FLAG_STATIC | FLAG_CONST
+        # Failure memo for the open-ended scans in _try_parse_decl: once a
+        # scan starting at index i runs off the end without finding its
+        # stop token, every later scan from >= i would too, so those
+        # attempts fail at once instead of rescanning to EOF (quadratic on
+        # unterminated input). len + 1 means "no failure seen yet".
+        self._no_close_from = len(tokens) + 1 # ']' for array suffixes
+        self._no_term_from = len(tokens) + 1  # ';' or ',' after '='
+
+    @property
+    def extracted_vars(self) -> List[VariableInfo]:
+        """Row view of the var_* columns, built on access."""
+        return [
+            VariableInfo(name, type_, value, line, bool(flags & FLAG_STATIC), bool(flags & FLAG_CONST))
+            for name, type_, value, line, flags in zip(
+                self.var_names, self.var_types, self.var_values, self.var_lines, self.var_flags)
+        ]
 
     def current_token(self) -> Optional[Token]:
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return self.tokens.token(self.pos) if self.pos < len(self.tokens) else None
 
     def peek(self, offset=1) -> Optional[Token]:
         idx = self.pos + offset
-        return self.tokens[idx] if idx < len(self.tokens) else None
+        return self.tokens.token(idx) if idx < len(self.tokens) else None
         
     def advance(self):
         self.pos += 1
 
     def parse(self):
-        while self.pos < len(self.tokens):
-            token = self.current_token()
+        # Hot loop: walk a local index over the local token columns rather
+        # than going through current_token()/advance() for every token
+        types = self.tokens.types
+        values = self.tokens.values
+        n = len(values)
+        scopes = self.scopes
+        decl_starters = _DECL_STARTERS
+        modifiers = _MODIFIERS
+        # Without inside_functions, function bodies are jumped over whole
+        # using a brace map built once up front
+        brace_match = None if self.inside_functions else _match_braces(values)
+        pos = self.pos
+        while pos < n:
+            value = values[pos]
             
             # Scope Enter
-            if token.value == '{':
-                self.scopes.append(Scope('block', start_line=token.line))
-                self.advance()
+            if value == '{':
+                if (brace_match is not None and pos in brace_match
+                        and _opens_function_body(values, pos)):
+                    pos = brace_match[pos] + 1
+                    continue
+                scopes.append(Scope('block', start_line=self.tokens.lines[pos]))
+                pos += 1
                 continue
             
             # Scope Exit
-            if token.value == '}':
-                if len(self.scopes) > 1:
-                    popped = self.scopes.pop()
+            if value == '}':
+                if len(scopes) > 1:
+                    popped = scopes.pop()
                     # Could capture scope end line here
-                self.advance()
+                pos += 1
                 continue
 
             # Detect Variable Declaration (Heuristic)
             # Pattern: [static/const] Type Name [= Value] [;]
             # Must start with Type (Identifier or Keyword like int)
-            if token.type in ('IDENTIFIER', 'KEYWORD'):
-                self._try_parse_decl()
+            if types[pos] == 'IDENTIFIER' or value in decl_starters:
+                # Unless it starts with a modifier, a declaration's type is
+                # followed by '*', '&' or the name; anything else (`foo(`,
+                # `a.b`, `x =`, `i++`) cannot match, so skip the attempt
+                nxt = pos + 1
+                if (value in modifiers or nxt < n and
+                        (types[nxt] == 'IDENTIFIER' or values[nxt] == '*' or values[nxt] == '&')):
+                    self.pos = pos
+                    self._try_parse_decl()
+                    pos = self.pos
             
-            self.advance()
+            pos += 1
+        self.pos = pos
 
     def _try_parse_decl(self):
-        # Very simplified fuzzy matcher for declarations
-        start_pos = self.pos
+        # Very simplified fuzzy matcher for declarations. Works on a local
+        # index and only writes self.pos back on success; leaving it
+        # untouched is the backtrack.
+        types = self.tokens.types
+        values = self.tokens.values
+        n = len(values)
+        pos = self.pos
         
         is_static = False
         is_const = False
         
         # Eat modifiers
-        while self.current_token().value in ('static', 'const', 'unsigned', 'signed'):
-            val = self.current_token().value
-            if val == 'static': is_static = True
-            if val == 'const': is_const = True
-            self.advance()
-            if not self.current_token(): return
+        val = values[pos]
+        while val in _MODIFIERS:
+            sets_static, sets_const = _MODIFIERS[val]
+            if sets_static: is_static = True
+            if sets_const: is_const = True
+            pos += 1
+            if pos >= n:
+                self.pos = pos
+                return
+            val = values[pos]
 
         # Type (Identifier or Basic Type)
-        type_token = self.current_token()
-        if type_token.type not in ('IDENTIFIER', 'KEYWORD') and type_token.value not in KEYWORDS:
-             self.pos = start_pos # Backtrack
-             return
+        if types[pos] not in ('IDENTIFIER', 'KEYWORD') and val not in KEYWORDS:
+             return # Backtrack
         
-        type_str = type_token.value
-        self.advance()
+        type_str = val
+        pos += 1
         
         # Pointers/Refs
-        while self.current_token() and self.current_token().value in ('*', '&'):
-            type_str += self.current_token().value
-            self.advance()
+        while pos < n and values[pos] in ('*', '&'):
+            type_str += values[pos]
+            pos += 1
 
         # Name
-        name_token = self.current_token()
-        if not name_token or name_token.type != 'IDENTIFIER':
-             self.pos = start_pos # Backtrack
-             return
+        if pos >= n or types[pos] != 'IDENTIFIER':
+             return # Backtrack
         
-        name_str = name_token.value
-        self.advance()
+        name_pos = pos
+        pos += 1
 
         # Array?
-        if self.current_token() and self.current_token().value == '[':
+        if pos < n and values[pos] == '[':
+             if pos >= self._no_close_from:
+                 return
+             scan_start = pos
              # Skip to ]
-             while self.current_token() and self.current_token().value != ']':
-                 self.advance()
-             if self.current_token() and self.current_token().value == ']':
-                 self.advance()
+             while pos < n and values[pos] != ']':
+                 pos += 1
+             if pos < n:
+                 pos += 1
                  type_str += "[]"
+             else:
+                 self._no_close_from = scan_start
         
         # Assignment?
         val_str = None
-        if self.current_token() and self.current_token().value == '=':
-            self.advance()
-            # Capture value until ; or ,
-            val_tokens = []
-            while self.current_token() and self.current_token().value not in (';', ','):
-                val_tokens.append(self.current_token().value)
-                self.advance()
-            val_str = " ".join(val_tokens)
+        if pos < n and values[pos] == '=':
+            pos += 1
+            if pos >= self._no_term_from:
+                return
+            val_start = pos
+            # Find the ; or , then join the value tokens in one slice
+            while pos < n and values[pos] not in (';', ','):
+                pos += 1
+            if pos >= n:
+                self._no_term_from = val_start
+                return
+            val_str = " ".join(values[val_start:pos])
 
         # Expect terminator or comma
-        if self.current_token() and self.current_token().value in (';', ','):
+        if pos < n and values[pos] in (';', ','):
              # Found a variable!
-             var_info = VariableInfo(name_str, type_str, val_str, name_token.line, is_static, is_const)
-             self.scopes[-1].variables.append(var_info)
-             self.extracted_vars.append(var_info)
+             self.scopes[-1].add_var(len(self.var_names))
+             # Types and names repeat heavily across a file; interned,
+             # each distinct string is stored once and compares by identity
+             self.var_names.append(sys.intern(values[name_pos]))
+             self.var_types.append(sys.intern(type_str))
+             self.var_values.append(val_str)
+             self.var_lines.append(self.tokens.lines[name_pos])
+             self.var_flags.append((FLAG_STATIC if is_static else 0) | (FLAG_CONST if is_const else 0))
              # Don't advance past ; let parse loop handle it
-             self.pos -= 1 
-        else:
-             # Failed match
-             self.pos = start_pos
+             self.pos = pos - 1
+        # else: failed match, self.pos still holds the start position
 
-def analyze_code(code: str):
+@functools.lru_cache(maxsize=32)
+def analyze_code(code: str, inside_functions: bool = True) -> Tuple[VariableInfo, ...]:
+    """
+    Extracts variable declarations from C++ source.
+
+    With inside_functions=False, function bodies are skipped and only
+    namespace/class level declarations are returned. Results are cached
+    per source text, so the result is an immutable tuple.
+    """
     tokenizer = CppTokenizer(code)
-    tokens = tokenizer.tokenize()
-    parser = CppParser(tokens)
+    tokens = tokenizer.tokenize_columns()
+    parser = CppParser(tokens, inside_functions)
     parser.parse()
-    return parser.extracted_vars
+    return tuple(parser.extracted_vars)
 
 if __name__ == '__main__':
     # Test
@@ -0,0 +1,140 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled tokenizer for semantic_analyzer.
+
+Optional: build in place with `cythonize -i semantic_analyzer_fast.pyx`.
+CppTokenizer uses it when the extension imports and falls back to its
+pure-Python regex scanner otherwise. Both produce identical tokens:
+same character classes as the regex (Unicode whitespace, identifier
+start [^\W\d], number start \d), unterminated strings and block
+comments run to the end of input, and unknown characters are skipped.
+"""
+
+from cpython cimport array
+from cpython.object cimport Py_SIZE, PyObject, PyTypeObject
+from cpython.unicode cimport Py_UNICODE_ISSPACE, Py_UNICODE_ISALNUM, Py_UNICODE_ISDECIMAL
+
+cdef PyTypeObject* TUPLE_TYPE = <PyTypeObject*>tuple
+
+cdef inline object new_token(type tp, str t_type, str value, Py_ssize_t line, Py_ssize_t col):
+    # tuple.__new__(tp, (...)) through the tuple type's tp_new slot, skipping
+    # the attribute lookup and method call
+    cdef tuple args = ((t_type, value, line, col),)
+    return TUPLE_TYPE.tp_new(tp, <PyObject*>args, NULL)
+
+cdef inline void append_int(array.array arr, int value):
+    cdef Py_ssize_t k = Py_SIZE(arr)
+    array.resize_smart(arr, k + 1)
+    arr.data.as_ints[k] = value
+
+cdef class Sink:
+    # Where scan() puts tokens: Token tuples in `tokens`, or, when that is
+    # None, the four TokenColumns columns
+    cdef type tp
+    cdef list tokens, types, values
+    cdef array.array lines, cols
+
+    cdef inline emit(self, str t_type, str value, Py_ssize_t line, Py_ssize_t col):
+        if self.tokens is not None:
+            self.tokens.append(new_token(self.tp, t_type, value, line, col))
+        else:
+            self.types.append(t_type)
+            self.values.append(value)
+            append_int(self.lines, line)
+            append_int(self.cols, col)
+
+cdef inline bint is_word(Py_UCS4 c):
+    return c == u'_' or Py_UNICODE_ISALNUM(c)
+
+def tokenize(str code, token_type, keywords):
+    """Returns the list of `token_type` tuples (type, value, line, col)."""
+    if not issubclass(token_type, tuple):
+        raise TypeError("token_type must be a tuple subclass")
+    cdef Sink sink = Sink()
+    sink.tp = token_type
+    sink.tokens = []
+    scan(code, keywords, sink)
+    return sink.tokens
+
+def tokenize_columns(str code, keywords, list types, list values,
+                     array.array lines, array.array cols):
+    """Appends each token's type, value, line and col to the given columns."""
+    if lines.ob_descr.typecode != b'i' or cols.ob_descr.typecode != b'i':
+        raise TypeError("lines and cols must be array('i')")
+    cdef Sink sink = Sink()
+    sink.types = types
+    sink.values = values
+    sink.lines = lines
+    sink.cols = cols
+    scan(code, keywords, sink)
+
+cdef scan(str code, keywords, Sink sink):
+    cdef Py_ssize_t n = len(code)
+    cdef Py_ssize_t i = 0, start, end, line = 1, line_start = 0
+    cdef Py_UCS4 c, quote
+    cdef str text
+
+    while i < n:
+        c = code[i]
+
+        if Py_UNICODE_ISSPACE(c):
+            if c == u'\n':
+                line += 1
+                line_start = i + 1
+            i += 1
+            continue
+
+        start = i
+        if is_word(c) and not Py_UNICODE_ISDECIMAL(c):
+            i += 1
+            while i < n and is_word(code[i]):
+                i += 1
+            text = code[start:i]
+            sink.emit('KEYWORD' if text in keywords else 'IDENTIFIER',
+                      text, line, start - line_start + 1)
+
+        elif Py_UNICODE_ISDECIMAL(c):
+            i += 1
+            while i < n and (code[i] == u'.' or Py_UNICODE_ISALNUM(code[i])):
+                i += 1
+            sink.emit('LITERAL', code[start:i], line, start - line_start + 1)
+
+        elif c == u'"' or c == u"'":
+            quote = c
+            i += 1
+            while i < n:
+                c = code[i]
+                if c == u'\\':
+                    i += 2
+                elif c == quote:
+                    i += 1
+                    break
+                else:
+                    i += 1
+            if i > n:
+                i = n
+            sink.emit('LITERAL', code[start:i], line, start - line_start + 1)
+            # The token keeps its start line; newlines inside still count
+            end = code.rfind('\n', start, i)
+            if end != -1:
+                line += code.count('\n', start, i)
+                line_start = end + 1
+
+        elif c == u'/' and i + 1 < n and code[i + 1] == u'/':
+            end = code.find('\n', i)
+            i = n if end == -1 else end
+
+        elif c == u'/' and i + 1 < n and code[i + 1] == u'*':
+            end = code.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            end = code.rfind('\n', start, i)
+            if end != -1:
+                line += code.count('\n', start, i)
+                line_start = end + 1
+
+        elif c in u'{}[]()=<>!+-*/%&|^~?:.,;': # Compiled to a switch
+            i += 1
+            sink.emit('OPERATOR', code[start:i], line, start - line_start + 1)
+
+        else:
+            i += 1